@@ -1,20 +1,94 @@
 import os
-from flask import Flask
+import sys
+import threading
+import time
+import orjson
+from flask import Flask, jsonify
+from flask.json.provider import JSONProvider
 from flasgger import Swagger
+from cache_manager import cache
 from mongodb_connection_manager import MongoConnectionManager
+
+# Initialize the database connection before the routes module binds its
+# collection handles. Fail fast: the app cannot serve a single request
+# without the database, so a misconfigured deployment should die at boot
+# instead of returning 500s.
+if MongoConnectionManager.initialize_db() is None:
+    sys.exit("Could not connect to the database")
+
 from routes import ads_blue_print
 
-app = Flask(__name__)
-Swagger(app) 
 
-# Initialize Database Connection
-MongoConnectionManager.initialize_db()
+class ORJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson, so every jsonify() response and
+    request.get_json() parse runs in native code instead of stdlib json.
+    datetime and UUID values are encoded natively by orjson; anything else
+    it does not know (e.g. BSON types like ObjectId) falls back to str().
+    """
+
+    # orjson always emits compact output with keys in insertion order; these
+    # mirror flask's DefaultJSONProvider attributes so nobody re-enables key
+    # sorting or pretty-printing expecting them to be honored here.
+    sort_keys = False
+    compact = True
+
+    @staticmethod
+    def _default(obj):
+        return str(obj)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, default=self._default).decode()
+
+    # Bind orjson.loads directly so request.get_json() pays no Python-level
+    # wrapper frame on top of the native parse
+    loads = staticmethod(orjson.loads)
+
+
+app = Flask(__name__)
+app.json = ORJSONProvider(app)
+Swagger(app)
+cache.init_app(app)
 
 # Register the ads blueprint
 app.register_blueprint(ads_blue_print)
 
+# Readiness flag refreshed by a background health checker. Request handlers
+# never branch on connectivity; only /healthz consumes this flag.
+_db_healthy = True
+
+HEALTH_CHECK_INTERVAL_SECONDS = int(os.environ.get('HEALTH_CHECK_INTERVAL', 30))
+
+
+def _health_check_loop():
+    global _db_healthy
+    while True:
+        time.sleep(HEALTH_CHECK_INTERVAL_SECONDS)
+        _db_healthy = MongoConnectionManager.ping()
+
+
+threading.Thread(target=_health_check_loop, daemon=True).start()
+
+
+@app.route('/healthz')
+def healthz():
+    """
+    Report whether the service and its database connection are healthy
+    ---
+    responses:
+        200:
+            description: The service is healthy
+        503:
+            description: The database connection is currently unavailable
+    """
+    if _db_healthy:
+        return jsonify({"status": "ok"}), 200
+    return jsonify({"status": "degraded"}), 503
+
 
 if __name__ == '__main__':
-    # Set the port for the Flask app (default: 8088)
+    # Dev entry point only. In production run under gunicorn with threaded
+    # workers (see Procfile) so I/O waits on MongoDB overlap across requests;
+    # the dev server handles one request at a time.
     port = int(os.environ.get('PORT', 8088))
-    app.run(debug=True, port=port)
\ No newline at end of file
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', port=port)
\ No newline at end of file
@@ -0,0 +1,15 @@
+import os
+from flask_caching import Cache
+
+# Read-heavy endpoints (analytics) are cached for a short TTL. The backing
+# store is Redis when REDIS_URL is configured, so all workers share one cache;
+# otherwise an in-process SimpleCache keeps local development dependency-free.
+_REDIS_URL = os.getenv("REDIS_URL")
+
+if _REDIS_URL:
+    cache = Cache(config={
+        "CACHE_TYPE": "RedisCache",
+        "CACHE_REDIS_URL": _REDIS_URL
+    })
+else:
+    cache = Cache(config={"CACHE_TYPE": "SimpleCache"})
@@ -14,6 +14,12 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 
 MONGO_URI = f"mongodb+srv://{DB_USERNAME}:{DB_PASSWORD}@{DB_CONNECTION_STRING}/{DB_NAME}"
 
+# Connection-pool sizing. Each gunicorn worker process owns its own client and
+# therefore its own pool, so MONGO_MAX_POOL should be at least the number of
+# threads per worker (workers * maxPoolSize sockets may be open against the DB).
+MONGO_MAX_POOL = int(os.getenv("MONGO_MAX_POOL", "100"))
+MONGO_MIN_POOL = int(os.getenv("MONGO_MIN_POOL", "10"))
+
 class MongoConnectionManager:
     __db = None
 
@@ -26,8 +32,34 @@ class MongoConnectionManager:
         """
         if MongoConnectionManager.__db is None:
             try:
-                # Create a new client and connect to the server
-                client = MongoClient(MONGO_URI, server_api=ServerApi('1'))
+                # Create a new client and connect to the server.
+                # The pool keeps MONGO_MIN_POOL sockets warm between bursts and
+                # caps concurrent sockets at MONGO_MAX_POOL; requests that find
+                # the pool exhausted fail after waitQueueTimeoutMS instead of
+                # queueing unboundedly.
+                client = MongoClient(
+                    MONGO_URI,
+                    server_api=ServerApi('1'),
+                    # Defer socket creation until first use so the client is
+                    # fork-safe: under gunicorn --preload the module imports in
+                    # the master, and sockets opened pre-fork would be shared
+                    # (and corrupted) across workers. The ping below still
+                    # connects eagerly in whichever process runs it.
+                    connect=False,
+                    maxPoolSize=MONGO_MAX_POOL,
+                    minPoolSize=MONGO_MIN_POOL,
+                    maxIdleTimeMS=60000,
+                    waitQueueTimeoutMS=2500,
+                    serverSelectionTimeoutMS=3000,
+                    retryWrites=True,
+                    # Ad _ids are stored as native BSON UUIDs (binary subtype 4)
+                    uuidRepresentation='standard',
+                    # Compress the wire protocol; the server negotiates the
+                    # first algorithm it supports (zlib is the fallback all
+                    # deployments speak). URL-heavy ad documents compress well.
+                    compressors='zstd,snappy,zlib',
+                    zlibCompressionLevel=6
+                )
 
                 # Send a ping to confirm a successful connection
                 client.admin.command('ping')
@@ -35,11 +67,45 @@ class MongoConnectionManager:
 
                 MongoConnectionManager.__db = client[DB_NAME] # client[DB_NAME] = the cluster - videosads
 
+                # Create the indexes backing common query paths
+                MongoConnectionManager.__ensure_indexes()
+
             except Exception as e:
                 print(e)
         
         return MongoConnectionManager.__db
     
+    @staticmethod
+    def ping():
+        """
+        Check that the database connection still answers
+        :return: True if the server responded to a ping
+        :rtype: bool
+        """
+        try:
+            MongoConnectionManager.get_db().command('ping')
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def __ensure_indexes():
+        """
+        Create the indexes that back the query paths in routes.py
+        :return: None
+        """
+        # create_index is idempotent, but guard anyway so a transient index
+        # build failure does not take the whole app down at startup
+        try:
+            ads = MongoConnectionManager.__db['ads']
+            ads.create_index("rand")  # Random-ad lookup (routes.get_random_ad)
+            ads.create_index("advertiser_link")  # Advertiser-scoped filters
+            events = MongoConnectionManager.__db['ad_events']
+            # Per-package event history, newest first (routes.add_ad_event)
+            events.create_index([("package_name", 1), ("date_time", -1)])
+        except Exception as e:
+            print(e)
+
     @staticmethod
     def get_db():
         """
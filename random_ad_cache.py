@@ -0,0 +1,72 @@
+import os
+import random
+import threading
+import time
+
+import orjson
+
+# Pool size and refresh cadence for the random-ad cache. Random ads are
+# interchangeable within a short window, so serving them from a periodically
+# refreshed local pool removes the database round trip from the steady-state
+# request path entirely.
+RANDOM_AD_CACHE_SIZE = int(os.getenv("RANDOM_AD_CACHE_SIZE", "64"))
+RANDOM_AD_REFRESH_MS = int(os.getenv("RANDOM_AD_REFRESH_MS", "3000"))
+
+
+class RandomAdCache:
+    """
+    Keeps a small pool of sampled, pre-serialized ads refreshed by a
+    background thread.
+
+    Pool members are stored as ready-to-send JSON bytes: the refresher pays
+    for the _id string conversion and orjson encode once per refresh, so
+    get() is a random choice over immutable byte strings — no BSON decode,
+    no JSON encode and no copy on the request path. Callers fall back to a
+    live lookup while the pool is empty (cold start, an empty ads
+    collection, or a refresh outage).
+    """
+
+    def __init__(self, collection, projection, size=RANDOM_AD_CACHE_SIZE, refresh_ms=RANDOM_AD_REFRESH_MS):
+        self._collection = collection
+        self._projection = dict(projection)
+        self._size = size
+        self._interval = refresh_ms / 1000.0
+        self._pool = []
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def get(self):
+        """
+        Get a random cached ad response body
+        :return: A random pooled ad as JSON bytes, or None if the pool is empty
+        :rtype: bytes
+        """
+        pool = self._pool  # The refresher swaps the whole list atomically
+        if not pool:
+            return None
+        return random.choice(pool)  # bytes are immutable, no copy needed
+
+    def _refresh(self):
+        # $sample MUST stay the first stage: only then can the server use its
+        # pseudo-random cursor path instead of scanning the collection and
+        # random-sorting it in memory. Any future filter (active-only ads,
+        # listed advertisers, ...) belongs after $sample, not before it; the
+        # $project also runs after so it touches size docs, not the whole
+        # collection.
+        pipeline = [
+            {"$sample": {"size": self._size}},
+            {"$project": self._projection}
+        ]
+        pool = []
+        for ad in self._collection.aggregate(pipeline):
+            ad['_id'] = str(ad['_id'])  # The stored _id is a binary BSON UUID
+            pool.append(orjson.dumps(ad))
+        if pool:
+            self._pool = pool
+
+    def _run(self):
+        while True:
+            try:
+                self._refresh()
+            except Exception:
+                pass  # Keep serving the previous pool through transient errors
+            time.sleep(self._interval)
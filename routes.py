@@ -1,14 +1,215 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from ad_counter_aggregator import AdCounterAggregator
+from ad_upload_batcher import AdUploadBatcher
+from cache_manager import cache
 from mongodb_connection_manager import MongoConnectionManager
+from random_ad_cache import RandomAdCache
+from pymongo.errors import PyMongoError
+from pymongo.write_concern import WriteConcern
+import msgspec
+import orjson
+import os
+import random
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+from msgspec import UNSET, UnsetType
+from typing import List, Union
 
 # Initialize Blueprint
 ads_blue_print = Blueprint('ads', __name__)
 
-# Reference the ads collection
+# Resolve the database handle and collections once at import time. get_db() and
+# db['...'] are both idempotent, so re-deriving them inside every handler only
+# added a function call, a None-branch and a dict lookup to each request.
 db = MongoConnectionManager.get_db()
+assert db is not None, "Could not connect to the database"
 ads_collection = db['ads']  # Collection name
+packages_collection = db['packages']
+# Ad events live in their own collection instead of an ever-growing array on
+# the package document, which would otherwise creep toward the 16MB BSON cap
+# and re-transmit the whole history on every package read
+events_collection = db['ad_events']
+
+# The upload path trades durability for latency: w=1, j=False acknowledges the
+# insert without waiting for replica acks or the journal fsync, which the
+# ad-upload workload tolerates. /upload_ad_durable keeps the safe variant for
+# uploads that must survive a primary failover.
+_ads_fast_writes = ads_collection.with_options(write_concern=WriteConcern(w=1, j=False))
+_ads_durable_writes = ads_collection.with_options(write_concern=WriteConcern(w="majority", j=True))
+
+# Coalesces concurrent /upload_ad requests into one insert_many round trip
+_upload_batcher = AdUploadBatcher(_ads_fast_writes)
+
+# Collapses per-event counter $incs into one bulk write per flush window
+_counter_aggregator = AdCounterAggregator(_ads_fast_writes)
+
+# Upper bound on the number of IDs accepted by /delete_ads, keeping the $in
+# array (and the request body) a sane size
+MAX_DELETE_BATCH = 1000
+
+# Request schemas decoded with msgspec: the JSON bytes are parsed and
+# validated in a single C-level pass into typed structs, replacing the
+# compiled-JSON-schema and per-field isinstance checks used previously.
+
+class UploadAdReq(msgspec.Struct):
+    """Body of /upload_ad, /upload_ad_durable and each element of /upload_ads"""
+    video_link: str
+    advertiser_link: str
+    advertiser_icon: str
+    price_per_click: float
+    price_per_impression: float
+    number_of_clicks: int = 0
+    number_of_impressions: int = 0
+
+
+class UpdateAdReq(msgspec.Struct, forbid_unknown_fields=True):
+    """Body of /update_ad; UNSET marks fields the client did not provide"""
+    advertiser_icon: Union[str, UnsetType] = UNSET
+    advertiser_link: Union[str, UnsetType] = UNSET
+    number_of_clicks: Union[int, UnsetType] = UNSET
+    number_of_impressions: Union[int, UnsetType] = UNSET
+    price_per_click: Union[float, UnsetType] = UNSET
+    price_per_impression: Union[float, UnsetType] = UNSET
+    video_link: Union[str, UnsetType] = UNSET
+
+
+class AdEventReq(msgspec.Struct):
+    """Body of /add_ad_event"""
+    ad_id: str
+    is_clicked: bool
+
+
+class AdAnalytics(msgspec.Struct):
+    """Per-ad row returned by /all_ad_analytics"""
+    ad_id: str
+    number_of_clicks: int
+    number_of_impressions: int
+    total_revenue: float
+    click_impression_ratio: float
+
+
+# Decoders are compiled once at import; the per-type decode plan is built
+# here instead of being looked up on every msgspec.json.decode(type=...) call
+_upload_ad_decoder = msgspec.json.Decoder(UploadAdReq)
+_upload_ads_decoder = msgspec.json.Decoder(List[UploadAdReq])
+_update_ad_decoder = msgspec.json.Decoder(UpdateAdReq)
+_ad_event_decoder = msgspec.json.Decoder(AdEventReq)
+
+# Shared encoder for analytics responses; it reuses its scratch buffer
+# across calls, and structs encode through a fixed C field layout instead
+# of per-key dict hashing
+_analytics_encoder = msgspec.json.Encoder()
+
+# How long analytics responses may be served from cache before hitting the
+# database again; ad-serving dashboards tolerate data this stale easily
+ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', '30'))
+
+
+def _invalidate_analytics_cache(ad_id=None):
+    """
+    Drop cached analytics responses after a write touches the ads collection
+    :param ad_id: The specific ad whose memoized analytics entry to drop, or
+        None to drop every per-ad entry (e.g. after delete_all_ads)
+    :return: None
+    """
+    cache.delete('all_ad_analytics')
+    if ad_id is not None:
+        cache.delete_memoized(get_ad_analytics, ad_id)
+    else:
+        cache.delete_memoized(get_ad_analytics)
+
+# Computes per-ad analytics server-side so only the five analytics fields per
+# ad cross the wire instead of full documents with video/icon URLs. Missing
+# counters and prices default to 0 exactly like the old Python loop did.
+_ANALYTICS_PIPELINE = [
+    {"$project": {
+        "number_of_clicks": {"$ifNull": ["$number_of_clicks", 0]},
+        "number_of_impressions": {"$ifNull": ["$number_of_impressions", 0]},
+        "total_revenue": {"$round": [{"$add": [
+            {"$multiply": [{"$ifNull": ["$price_per_click", 0]},
+                           {"$ifNull": ["$number_of_clicks", 0]}]},
+            {"$multiply": [{"$ifNull": ["$price_per_impression", 0]},
+                           {"$ifNull": ["$number_of_impressions", 0]}]}
+        ]}, 2]},
+        "click_impression_ratio": {"$round": [{"$cond": [
+            {"$gt": [{"$ifNull": ["$number_of_impressions", 0]}, 0]},
+            {"$divide": [{"$ifNull": ["$number_of_clicks", 0]}, "$number_of_impressions"]},
+            0
+        ]}, 4]}
+    }}
+]
+
+# Public ad fields served to clients. Projecting on these keeps internal keys
+# (e.g. 'rand') out of responses and bounds BSON decode and network bytes to
+# what the API actually returns.
+AD_FIELDS = ('video_link', 'advertiser_link', 'advertiser_icon',
+             'number_of_clicks', 'number_of_impressions',
+             'price_per_click', 'price_per_impression')
+_AD_PROJECTION = {field: 1 for field in AD_FIELDS}  # '_id' is included implicitly
+
+# Periodically refreshed sample pool backing /get_ad (see get_random_ad)
+_random_ad_cache = RandomAdCache(ads_collection, _AD_PROJECTION)
+
+
+def _parse_json():
+    """
+    Parse the request body with orjson, bypassing Flask's request.json
+    property so the bytes are decoded in one pass without being cached on
+    the request object
+    :return: The decoded body, or None if the body is not valid JSON
+    """
+    try:
+        return orjson.loads(request.get_data(cache=False) or b'{}')
+    except orjson.JSONDecodeError:
+        return None
+
+
+def parse_ad_id(ad_id):
+    """
+    Parse an ad ID string into the UUID stored as the Mongo _id
+    :param ad_id: The ad ID as received from the client
+    :return: The parsed UUID, or None if the string is not a valid UUID
+    :rtype: uuid.UUID
+    """
+    try:
+        return uuid.UUID(ad_id)
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+def _build_ad_object(req):
+    """
+    Build the ad document stored in the ads collection from a decoded payload
+    :param req: The decoded UploadAdReq
+    :return: The ad document to insert
+    :rtype: dict
+    """
+    # The _id is a native BSON UUID (16 bytes) rather than its 36-char string
+    # form, which keeps the _id index small; responses still expose it as a string.
+    return {
+        "_id": uuid.uuid4(),
+        "video_link": req.video_link,
+        "advertiser_link": req.advertiser_link,
+        "advertiser_icon": req.advertiser_icon,
+        "rand": random.random(),  # Random sort key used by /get_ad (see get_random_ad)
+        "number_of_clicks": req.number_of_clicks,  # Struct default is 0
+        "number_of_impressions": req.number_of_impressions,  # Struct default is 0
+        "price_per_click": req.price_per_click,
+        "price_per_impression": req.price_per_impression
+    }
+
+@ads_blue_print.errorhandler(PyMongoError)
+def _handle_pymongo_error(e):
+    """
+    Translate driver errors that escape a handler into a JSON 500
+    :param e: The PyMongoError raised by the driver
+    :return: The JSON error response
+    """
+    # Safety net for driver errors raised outside a handler's try block
+    # (e.g. pool exhaustion surfacing during cursor iteration); handlers keep
+    # their own except clauses for responses with more specific wording
+    return jsonify({"error": str(e)}), 500
+
 
 # 1. Create a route to upload an ad
 @ads_blue_print.route('/upload_ad', methods=['POST'])
@@ -52,55 +253,153 @@ def upload_ad():
         500:
             description: An error occurred while uploading the ad
     """
-    data = request.json
+    # Decode and validate the body in one pass over the raw bytes
+    try:
+        req = _upload_ad_decoder.decode(request.get_data(cache=False) or b'{}')
+    except msgspec.DecodeError as e:
+        return jsonify({"error": str(e)}), 400
 
-    db = MongoConnectionManager.get_db()
+    ad_object = _build_ad_object(req)
 
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
-    
-    # Check if the required fields are present
-    required_fields = ['video_link', 'advertiser_link', 'advertiser_icon', 'price_per_click', 'price_per_impression']
-    missing_fields = [field for field in required_fields if field not in data]
-    if missing_fields:
-        return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
-    
-    # Validate 'video_link', 'advertiser_link', and 'advertiser_icon' as strings
-    for field in ['video_link', 'advertiser_link', 'advertiser_icon']:
-        if not isinstance(data[field], str):
-            return jsonify({"error": f"The '{field}' field should be a string"}), 400
-    
-    # Validate 'price_per_click' and 'price_per_impression' as numbers
-    for field in ['price_per_click', 'price_per_impression']:
-        if not isinstance(data[field], (int, float)):
-            return jsonify({"error": f"The '{field}' field should be a number"}), 400
+    # Insert the ad object into the database. Concurrent uploads landing in
+    # the same few-millisecond window are flushed as a single insert_many.
+    try:
+        error = _upload_batcher.insert(ad_object)
+        if error is not None:
+            return jsonify({"error": str(error)}), 500
+        _invalidate_analytics_cache(str(ad_object["_id"]))
+        return jsonify({"message": "Ad uploaded successfully!", '_id': str(ad_object["_id"])}), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
     
-    # Validate 'number_of_clicks' and 'number_of_impressions' as integers (defaults to 0)
-    for field in ['number_of_clicks', 'number_of_impressions']:
-        if field in data and not isinstance(data[field], int):
-            return jsonify({"error": f"The '{field}' field should be an integer"}), 400
-
-    # Create an ad object with the new fields
-    ad_object = {
-        "_id": str(uuid.uuid4()), 
-        "video_link": data['video_link'],
-        "advertiser_link": data['advertiser_link'],
-        "advertiser_icon": data['advertiser_icon'],
-        "number_of_clicks": data.get('number_of_clicks', 0),  # Default to 0 if not provided
-        "number_of_impressions": data.get('number_of_impressions', 0),  # Default to 0 if not provided
-        "price_per_click": data['price_per_click'],
-        "price_per_impression": data['price_per_impression']
-    }
+# 1a. Create a route to upload an ad with a durable write concern
+@ads_blue_print.route('/upload_ad_durable', methods=['POST'])
+def upload_ad_durable():
+    """
+    Upload an ad object with a majority write concern and journaling
+    ---
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+            type: object
+            properties:
+                video_link:
+                    type: string
+                    description: The link to the video ad
+                advertiser_link:
+                    type: string
+                    description: The link to the advertiser's website
+                advertiser_icon:
+                    type: string
+                    description: The URL to the advertiser's icon image
+                price_per_click:
+                    type: number
+                    description: The price per click for the ad
+                price_per_impression:
+                    type: number
+                    description: The price per impression for the ad
+                number_of_clicks:
+                    type: integer
+                    description: The number of clicks on the ad (optional)
+                number_of_impressions:
+                    type: integer
+                    description: The number of times the ad has been presented in the app (optional)
+    responses:
+        201:
+            description: Ad uploaded successfully
+        400:
+            description: The request was invalid
+        500:
+            description: An error occurred while uploading the ad
+    """
+    # Decode and validate the body in one pass over the raw bytes
+    try:
+        req = _upload_ad_decoder.decode(request.get_data(cache=False) or b'{}')
+    except msgspec.DecodeError as e:
+        return jsonify({"error": str(e)}), 400
 
-    # Insert the ad object into the database
+    ad_object = _build_ad_object(req)
+
+    # Wait for the majority of the replica set and the journal fsync, so the
+    # ad survives a primary failover at the cost of one extra round trip
     try:
-        ads_collection = db['ads']
-        ads_collection.insert_one(ad_object)
-        return jsonify({"message": "Ad uploaded successfully!", '_id': ad_object["_id"]}), 201
+        _ads_durable_writes.insert_one(ad_object)
+        _invalidate_analytics_cache(str(ad_object["_id"]))
+        return jsonify({"message": "Ad uploaded successfully!", '_id': str(ad_object["_id"])}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    
+
+# 1b. Create a route to upload a batch of ads in one database round trip
+@ads_blue_print.route('/upload_ads', methods=['POST'])
+def upload_ads():
+    """
+    Upload a batch of ad objects to the MongoDB database in a single write
+    ---
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+            type: array
+            items:
+                type: object
+                properties:
+                    video_link:
+                        type: string
+                        description: The link to the video ad
+                    advertiser_link:
+                        type: string
+                        description: The link to the advertiser's website
+                    advertiser_icon:
+                        type: string
+                        description: The URL to the advertiser's icon image
+                    price_per_click:
+                        type: number
+                        description: The price per click for the ad
+                    price_per_impression:
+                        type: number
+                        description: The price per impression for the ad
+                    number_of_clicks:
+                        type: integer
+                        description: The number of clicks on the ad (optional)
+                    number_of_impressions:
+                        type: integer
+                        description: The number of times the ad has been presented in the app (optional)
+    responses:
+        201:
+            description: All ads uploaded successfully
+        400:
+            description: The request was invalid
+        500:
+            description: An error occurred while uploading the ads
+    """
+    # Decode and validate the whole batch in one pass over the raw bytes
+    try:
+        reqs = _upload_ads_decoder.decode(request.get_data(cache=False) or b'{}')
+    except msgspec.DecodeError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not reqs:
+        return jsonify({"error": "Request body must be a non-empty JSON array of ads"}), 400
+
+    ad_objects = [_build_ad_object(req) for req in reqs]
+
+    # One insert_many round trip replaces N insert_one calls; ordered=False
+    # lets the server apply the batch without stopping at the first failure.
+    # Server-side document validation is skipped because every ad already
+    # passed the typed decode above.
+    try:
+        _ads_fast_writes.insert_many(ad_objects, ordered=False, bypass_document_validation=True)
+        _invalidate_analytics_cache()
+        return jsonify({
+            "message": f"{len(ad_objects)} ads uploaded successfully!",
+            "_ids": [str(ad_object["_id"]) for ad_object in ad_objects]
+        }), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # 2. Create a route to fetch a random ad
 @ads_blue_print.route('/get_ad', methods=['GET'])
 def get_random_ad():
@@ -115,17 +414,23 @@ def get_random_ad():
         500:
             description: An error occurred while fetching the ad object
     """
-    db = MongoConnectionManager.get_db()
-
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
-
     try:
-        ads_collection = db['ads']
-        # Use MongoDB's $sample aggregation stage to fetch a random document
-        random_ad_cursor = ads_collection.aggregate([{"$sample": {"size": 1}}])
-        random_ad = next(random_ad_cursor, None)  # Get the first (and only) result
+        # Steady state: the pool holds pre-serialized response bodies, so a
+        # hit costs no database round trip, no BSON decode and no JSON
+        # encode — just a random choice over ready-to-send bytes
+        body = _random_ad_cache.get()
+        if body is not None:
+            return Response(body, mimetype='application/json'), 200
+
+        # Cold start or empty pool: seek a random point on the indexed
+        # 'rand' field instead of $sample, which can fall back to a full
+        # collection scan plus in-memory random sort. Wrap around with a
+        # $lt probe if the draw lands past the largest stored value.
+        r = random.random()
+        random_ad = (
+            ads_collection.find_one({"rand": {"$gte": r}}, _AD_PROJECTION, sort=[("rand", 1)])
+            or ads_collection.find_one({"rand": {"$lt": r}}, _AD_PROJECTION, sort=[("rand", -1)])
+        )
 
         if not random_ad:
             return jsonify({"error": "No ads available"}), 404
@@ -186,62 +491,42 @@ def update_ad(ad_id):
         500:
             description: An error occurred while updating the ad
     """
-    data = request.json
-
-    # Define the expected field types for validation
-    expected_field_types = {
-        'advertiser_icon': str,
-        'advertiser_link': str,
-        'number_of_clicks': int,
-        'number_of_impressions': int,
-        'price_per_click': (int, float),
-        'price_per_impression': (int, float),
-        'video_link': str
+    # Decode and validate the body in one pass over the raw bytes; unknown
+    # fields and wrong types are rejected by the struct itself
+    try:
+        req = _update_ad_decoder.decode(request.get_data(cache=False) or b'{}')
+    except msgspec.DecodeError as e:
+        return jsonify({"error": "Invalid input", "details": [str(e)]}), 400
+
+    # Only the fields the client actually sent make it into $set
+    update_data = {
+        field: value
+        for field in req.__struct_fields__
+        if (value := getattr(req, field)) is not UNSET
     }
 
-    # Validate the input
-    if not data:
-        return jsonify({"error": "Request body is empty. Please provide data to update."}), 400
-
-    update_data = {}
-    errors = []
-
-    for key, value in data.items():
-        if key not in expected_field_types:
-            errors.append(f"Invalid field '{key}' provided.")
-        elif not isinstance(value, expected_field_types[key]):
-            expected_type_name = (
-                "integer or float" if isinstance(expected_field_types[key], tuple) 
-                else expected_field_types[key].__name__
-            )
-            errors.append(f"Field '{key}' must be of type {expected_type_name}.")
-        else:
-            # Add valid fields to the update_data
-            update_data[key] = value
-
-    if errors:
-        return jsonify({"error": "Invalid input", "details": errors}), 400
-
     if not update_data:
         return jsonify({"error": "No valid fields to update. Please provide at least one valid field."}), 400
 
-    db = MongoConnectionManager.get_db()
+    # A malformed ID cannot match any stored ad
+    ad_uuid = parse_ad_id(ad_id)
+    if ad_uuid is None:
+        return jsonify({"error": "Ad not found"}), 404
 
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
-
-    # Attempt to update the ad
+    # Attempt to update the ad. find_one_and_update folds the update and the
+    # existence check into one server command, and the _id-only projection
+    # keeps the returned document to a single small field.
     try:
-        ads_collection = db['ads']
-        result = ads_collection.update_one(
-            {"_id": ad_id},
-            {"$set": update_data}
+        updated = ads_collection.find_one_and_update(
+            {"_id": ad_uuid},
+            {"$set": update_data},
+            projection={"_id": 1}
         )
 
-        if result.matched_count == 0:
+        if updated is None:
             return jsonify({"error": "Ad not found"}), 404
 
+        _invalidate_analytics_cache(ad_id)
         return jsonify({"message": "Ad updated successfully!"}), 200
 
     except Exception as e:
@@ -253,28 +538,51 @@ def get_all_ads():
     """
     Get all ad objects from the MongoDB database
     ---
+    parameters:
+      - name: fields
+        in: query
+        required: false
+        type: string
+        description: Comma-separated subset of ad fields to return (e.g. "price_per_click,price_per_impression"); _id is always included
     responses:
         200:
             description: The list of ad objects was fetched successfully
+        400:
+            description: An unknown field was requested
         500:
             description: An error occurred while fetching the ad objects
     """
-    db = MongoConnectionManager.get_db()
-
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
-
-    # Fetch all ad objects from the database
+    # Clients that only need a couple of fields (e.g. pricing dashboards) can
+    # narrow the projection further; names outside AD_FIELDS are rejected so
+    # internal keys like 'rand' stay unreachable
+    projection = _AD_PROJECTION
+    fields_arg = request.args.get('fields')
+    if fields_arg:
+        fields = [field.strip() for field in fields_arg.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in AD_FIELDS]
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+        projection = {field: 1 for field in fields}
+
+    # Stream the ad objects out of the cursor instead of materializing the
+    # whole collection in memory: each batch is orjson-encoded and flushed as
+    # soon as it arrives, so peak memory stays at one cursor batch.
+    def generate():
+        first = True
+        yield b'['
+        for ad in ads_collection.find({}, projection).batch_size(500):
+            # _id is a binary BSON UUID, so the string conversion cannot be
+            # dropped or pushed into a $toString projection (which does not
+            # support the UUID subtype); one str() per doc is the floor here
+            ad['_id'] = str(ad['_id'])
+            yield (b'' if first else b',') + orjson.dumps(ad)
+            first = False
+        yield b']'
+
+    # stream_with_context keeps the request context alive while the worker
+    # drains the cursor, since the generator runs after the view returns
     try:
-        ads_collection = db['ads']
-        ads = list(ads_collection.find())  # Convert cursor to list
-
-        # Convert _id to string for all ad objects
-        for ad in ads:
-            ad['_id'] = str(ad['_id'])  # Ensure ID is a string for JSON serialization
-
-        return jsonify(ads), 200
+        return Response(stream_with_context(generate()), mimetype='application/json'), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -299,25 +607,72 @@ def delete_ad(ad_id):
         500:
             description: An error occurred while deleting the ad
     """
-    db = MongoConnectionManager.get_db()
-
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
+    # A malformed ID cannot match any stored ad
+    ad_uuid = parse_ad_id(ad_id)
+    if ad_uuid is None:
+        return jsonify({"error": "Ad not found"}), 404
 
     # Attempt to delete the ad object by ID
     try:
-        ads_collection = db['ads']
-        result = ads_collection.delete_one({"_id": ad_id})
+        result = ads_collection.delete_one({"_id": ad_uuid})
 
         if result.deleted_count == 0:
             return jsonify({"error": "Ad not found"}), 404
 
+        _invalidate_analytics_cache(ad_id)
         return jsonify({"message": "Ad deleted successfully!"}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
+# 5b. Create a route to delete a batch of ads in one database round trip
+@ads_blue_print.route('/delete_ads', methods=['DELETE'])
+def delete_ads():
+    """
+    Delete a batch of ad objects from the MongoDB database by ID
+    ---
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+            type: object
+            properties:
+                ids:
+                    type: array
+                    items:
+                        type: string
+                    description: The IDs of the ad objects to delete
+    responses:
+        200:
+            description: The matching ads were deleted
+        400:
+            description: The request was invalid
+        500:
+            description: An error occurred while deleting the ads
+    """
+    data = _parse_json()
+
+    ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"error": "'ids' must be a non-empty list of ad IDs"}), 400
+    if len(ids) > MAX_DELETE_BATCH:
+        return jsonify({"error": f"'ids' cannot contain more than {MAX_DELETE_BATCH} IDs"}), 400
+    if not all(isinstance(ad_id, str) for ad_id in ids):
+        return jsonify({"error": "'ids' must contain only strings"}), 400
+
+    # Malformed IDs cannot match any stored ad, so they are simply dropped
+    ad_uuids = [ad_uuid for ad_uuid in map(parse_ad_id, ids) if ad_uuid is not None]
+
+    # One delete_many with $in replaces N delete_one round trips
+    try:
+        result = ads_collection.delete_many({"_id": {"$in": ad_uuids}})
+        _invalidate_analytics_cache()
+        return jsonify({"deleted": result.deleted_count}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # 6. Create a route to delete all ads
 @ads_blue_print.route('/delete_all_ads', methods=['DELETE'])
 def delete_all_ads():
@@ -330,20 +685,14 @@ def delete_all_ads():
         500:
             description: An error occurred while deleting all ads
     """
-    db = MongoConnectionManager.get_db()
-
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
-
     # Attempt to delete all ad objects
     try:
-        ads_collection = db['ads']
         result = ads_collection.delete_many({})  # Delete all documents in the collection
 
         if result.deleted_count == 0:
             return jsonify({"message": "No ads to delete"}), 404
 
+        _invalidate_analytics_cache()
         return jsonify({"message": "All ads deleted successfully!"}), 200
 
     except Exception as e:
@@ -367,29 +716,21 @@ def create_package(package_name):
         500:
             description: An error occurred while creating the package.
     """
-    db = MongoConnectionManager.get_db()
-
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
-
     try:
-        packages_collection = db['packages']
+        # One atomic upsert replaces the old find-then-insert pair: a single
+        # round trip, and no race window where two concurrent creates both
+        # pass the existence check. $setOnInsert leaves an existing package's
+        # ads_events untouched.
+        result = packages_collection.update_one(
+            {"_id": package_name},
+            {"$setOnInsert": {"ads_events": []}},
+            upsert=True
+        )
 
-        # Check if the package already exists
-        existing_package = packages_collection.find_one({"_id": package_name})
-        if existing_package:
-            # Return success if the package already exists
+        if result.upserted_id is None:
+            # The filter matched, so the package already existed
             return jsonify({"message": f"Package '{package_name}' already exists."}), 200
 
-        # Create the package object
-        package_object = {
-            "_id": package_name,
-            "ads_events": []  # Empty array for ads_events
-        }
-
-        # Insert the package object into the database
-        packages_collection.insert_one(package_object)
         return jsonify({"message": f"Package '{package_name}' created successfully!"}), 200
 
     except Exception as e:
@@ -429,71 +770,49 @@ def add_ad_event(package_name):
         500:
             description: An error occurred while adding the ad event
     """
-    data = request.json
-
-    # Check if the required fields are present
-    required_fields = ['ad_id', 'is_clicked']
-    missing_fields = [field for field in required_fields if field not in data]
-    if missing_fields:
-        return jsonify({"error": f"Missing required fields: {', '.join(missing_fields)}"}), 400
-
-    # Validate 'ad_id' as a string
-    if not isinstance(data['ad_id'], str):
-        return jsonify({"error": "'ad_id' must be a string"}), 400
-
-    # Validate 'is_clicked' as a boolean
-    if not isinstance(data['is_clicked'], bool):
-        return jsonify({"error": "'is_clicked' must be a boolean"}), 400
-
-    db = MongoConnectionManager.get_db()
+    # Decode and validate the body in one pass over the raw bytes
+    try:
+        req = _ad_event_decoder.decode(request.get_data(cache=False) or b'{}')
+    except msgspec.DecodeError as e:
+        return jsonify({"error": str(e)}), 400
 
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
+    # A malformed ID cannot match any stored ad
+    ad_uuid = parse_ad_id(req.ad_id)
+    if ad_uuid is None:
+        return jsonify({"error": "Ad not found"}), 404
 
-    # Calculate the current date_time using datetime.now()
-    date_time = datetime.now().isoformat()
+    # Stored as a native BSON date (8 bytes vs ~25 for the old ISO string),
+    # so time-window analytics can range-query it without $dateFromString.
+    # UTC keeps events comparable regardless of which worker recorded them.
+    date_time = datetime.now(timezone.utc)
 
     try:
-        packages_collection = db['packages']
-        ads_collection = db['ads']
+        # Counter updates are buffered (see AdCounterAggregator), so the ad's
+        # existence no longer rides on a per-event $inc. count_documents with
+        # limit=1 is the cheapest probe: the _id index answers it without
+        # fetching the document.
+        if ads_collection.count_documents({"_id": ad_uuid}, limit=1) == 0:
+            return jsonify({"error": "Ad not found"}), 404
 
-        # Find the package by package_name
-        package = packages_collection.find_one({"_id": package_name})
-        if not package:
+        if packages_collection.count_documents({"_id": package_name}, limit=1) == 0:
             return jsonify({"error": "Package not found"}), 404
 
-        # Find the ad by ad_id
-        ad = ads_collection.find_one({"_id": data['ad_id']})
-        if not ad:
-            return jsonify({"error": "Ad not found"}), 404
-
-        # Create the ad_event object
-        ad_event = {
-            "ad_id": data['ad_id'],
+        # Append the event to its own collection (the ad reference uses the
+        # native UUID, matching the _id type in the ads collection); the
+        # (package_name, date_time) index keeps per-package history queries
+        # index-backed no matter how large the event log grows
+        events_collection.insert_one({
+            "package_name": package_name,
+            "ad_id": ad_uuid,
             "date_time": date_time,
-            "is_clicked": data['is_clicked']
-        }
+            "is_clicked": req.is_clicked
+        })
 
-        # Add the ad_event to the ads_events array
-        packages_collection.update_one(
-            {"_id": package_name},
-            {"$push": {"ads_events": ad_event}}
-        )
-
-        # Increment the number_of_impressions in the ads collection
-        ads_collection.update_one(
-            {"_id": data['ad_id']},
-            {"$inc": {"number_of_impressions": 1}}
-        )
-
-        # Increment the number_of_clicks in the ads collection if is_clicked is true
-        if data['is_clicked']:
-            ads_collection.update_one(
-                {"_id": data['ad_id']},
-                {"$inc": {"number_of_clicks": 1}}
-            )
+        # Buffer the counter deltas; every event for this ad within the flush
+        # window lands on the database as a single summed $inc
+        _counter_aggregator.add(ad_uuid, req.is_clicked)
 
+        _invalidate_analytics_cache(req.ad_id)
         return jsonify({"message": "Ad event added successfully!"}), 200
 
     except Exception as e:
@@ -501,6 +820,7 @@ def add_ad_event(package_name):
     
 # 9. Create a route to fetch analytics for a specific ad
 @ads_blue_print.route('/ad_analytics/<ad_id>', methods=['GET'])
+@cache.memoize(timeout=ANALYTICS_CACHE_TTL)
 def get_ad_analytics(ad_id):
     """
     Get analytics for a specific ad, including the number of clicks, impressions, revenue generated, 
@@ -520,17 +840,20 @@ def get_ad_analytics(ad_id):
         500:
             description: An error occurred while fetching the ad analytics
     """
-    db = MongoConnectionManager.get_db()
-
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
+    # A malformed ID cannot match any stored ad
+    ad_uuid = parse_ad_id(ad_id)
+    if ad_uuid is None:
+        return jsonify({"error": "Ad not found"}), 404
 
     try:
-        ads_collection = db['ads']
-        
-        # Fetch the ad with the given ID (querying by 'ad_id' directly)
-        ad = ads_collection.find_one({"_id": ad_id})
+        # Fetch only the counter and price fields needed for the analytics;
+        # the built-in _id index covers the lookup, so without the projection
+        # the full document (video/icon URLs included) would cross the wire
+        ad = ads_collection.find_one(
+            {"_id": ad_uuid},
+            {"number_of_clicks": 1, "number_of_impressions": 1,
+             "price_per_click": 1, "price_per_impression": 1, "_id": 0}
+        )
 
         if not ad:
             return jsonify({"error": "Ad not found"}), 404
@@ -566,6 +889,7 @@ def get_ad_analytics(ad_id):
 
 # 10. Create a route to fetch analytics for all ads
 @ads_blue_print.route('/all_ad_analytics', methods=['GET'])
+@cache.cached(timeout=ANALYTICS_CACHE_TTL, key_prefix='all_ad_analytics')
 def get_all_ad_analytics():
     """
     Get analytics for all ads, including the number of clicks, impressions, revenue generated, 
@@ -577,51 +901,25 @@ def get_all_ad_analytics():
         500:
             description: An error occurred while fetching the ads analytics
     """
-    db = MongoConnectionManager.get_db()
-
-    # Check if the database connection was successful
-    if db is None:
-        return jsonify({"error": "Could not connect to the database"}), 500
-
     try:
-        ads_collection = db['ads']
-        
-        # Fetch all ads from the collection
-        ads = ads_collection.find()
-
-        # Prepare the list to store analytics for all ads
-        all_ads_analytics = []
-
-        # Iterate over each ad and calculate analytics
-        for ad in ads:
-            ad_id = str(ad["_id"])  # Get the ad_id (using _id field in MongoDB)
-            number_of_clicks = ad.get('number_of_clicks', 0)
-            number_of_impressions = ad.get('number_of_impressions', 0)
-            price_per_click = ad.get('price_per_click', 0.0)
-            price_per_impression = ad.get('price_per_impression', 0.0)
-
-            # Calculate the total revenue
-            total_revenue = (price_per_click * number_of_clicks) + (price_per_impression * number_of_impressions)
-
-            # Calculate the ratio of clicks to impressions (handle division by zero)
-            if number_of_impressions > 0:
-                click_impression_ratio = number_of_clicks / number_of_impressions
-            else:
-                click_impression_ratio = 0  # Avoid division by zero
-
-            # Prepare the analytics data for this ad
-            ad_analytics = {
-                "ad_id": ad_id,
-                "number_of_clicks": number_of_clicks,
-                "number_of_impressions": number_of_impressions,
-                "total_revenue": round(total_revenue, 2),
-                "click_impression_ratio": round(click_impression_ratio, 4)
-            }
-
-            all_ads_analytics.append(ad_analytics)
+        # Revenue and click ratio are computed in the aggregation pipeline;
+        # the only Python work left is renaming the binary UUID _id to a
+        # string ad_id ($toString does not support BSON UUIDs server-side).
+        # Rows become fixed-layout structs rather than transient dicts and
+        # are encoded with the shared module-level encoder.
+        all_ads_analytics = [
+            AdAnalytics(
+                ad_id=str(ad_analytics["_id"]),
+                number_of_clicks=ad_analytics["number_of_clicks"],
+                number_of_impressions=ad_analytics["number_of_impressions"],
+                total_revenue=ad_analytics["total_revenue"],
+                click_impression_ratio=ad_analytics["click_impression_ratio"]
+            )
+            for ad_analytics in ads_collection.aggregate(_ANALYTICS_PIPELINE)
+        ]
 
         # Return the list of all ads analytics
-        return jsonify(all_ads_analytics), 200
+        return Response(_analytics_encoder.encode(all_ads_analytics), mimetype='application/json'), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
\ No newline at end of file